@@ -0,0 +1,163 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+from starlette.responses import JSONResponse
+from app.services.deadline import set_deadline, reset_deadline
+
+# Cost classes: expensive endpoints get a small concurrency budget and short queue so that
+# cheap lookups never wait behind IDW/regression work. Limits can be overridden per class with
+# ADMISSION_<CLASS>_CONCURRENCY, ADMISSION_<CLASS>_QUEUE and ADMISSION_<CLASS>_QUEUE_TIMEOUT.
+COST_CLASS_DEFAULTS = {
+    "cheap": {"concurrency": 32, "queue": 64, "queue_timeout": 2.0},
+    "expensive": {"concurrency": 4, "queue": 8, "queue_timeout": 10.0},
+}
+
+ENDPOINT_COST_CLASSES = {
+    "/api/v1/groundwater-analysis": "expensive",
+    "/api/v1/groundwater-trends": "expensive",
+    "/api/v1/groundwater-comparison": "expensive",
+    "/api/v1/anomalies": "expensive",
+    "/api/v1/idw-validation": "expensive",
+}
+
+DEADLINE_HEADER = b"x-request-timeout"
+MAX_REQUEST_TIMEOUT_SECONDS = 600.0
+
+
+def _cost_class_config(name: str) -> Dict[str, float]:
+    defaults = COST_CLASS_DEFAULTS[name]
+    prefix = f"ADMISSION_{name.upper()}_"
+    return {
+        "concurrency": int(os.getenv(prefix + "CONCURRENCY", str(defaults["concurrency"]))),
+        "queue": int(os.getenv(prefix + "QUEUE", str(defaults["queue"]))),
+        "queue_timeout": float(os.getenv(prefix + "QUEUE_TIMEOUT", str(defaults["queue_timeout"]))),
+    }
+
+
+def cost_class_for(path: str) -> Optional[str]:
+    """Cost class for a request path, or None for paths that bypass admission control."""
+    if not path.startswith("/api/") or path.endswith("/events"):
+        # Docs, root and long-lived progress streams are not worth a slot
+        return None
+    return ENDPOINT_COST_CLASSES.get(path, "cheap")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Concurrency limit with a bounded FIFO wait queue; slots are handed directly to the next waiter."""
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+        self._avg_service_seconds = 0.5
+
+    def retry_after(self) -> int:
+        backlog = (len(self._waiters) + 1) / max(self.concurrency, 1)
+        return max(1, math.ceil(backlog * self._avg_service_seconds))
+
+    async def acquire(self, deadline: Optional[float]):
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue:
+            raise AdmissionRejected(429, f"Too many queued {self.name} requests", self.retry_after())
+
+        timeout = self.queue_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise AdmissionRejected(504, "Request deadline exceeded while queued")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # release() handed us the slot as the timeout fired (wait_for raises anyway on 3.12+)
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                raise AdmissionRejected(504, "Request deadline exceeded while queued")
+            raise AdmissionRejected(503, f"Server busy: {self.name} capacity exhausted", self.retry_after())
+        except BaseException:
+            # Cancelled after the slot was handed over: give it back
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, service_seconds: float):
+        if service_seconds > 0:
+            self._avg_service_seconds = 0.8 * self._avg_service_seconds + 0.2 * service_seconds
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # slot passes to the waiter; active count unchanged
+                return
+        self.active -= 1
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying per-cost-class concurrency limits with fast 429/503 rejection.
+    Clients may send X-Request-Timeout (seconds); the resulting deadline bounds queueing and is
+    exposed to service code through app.services.deadline.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.limiters = {
+            name: ConcurrencyLimiter(name, **_cost_class_config(name)) for name in COST_CLASS_DEFAULTS
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cost_class = cost_class_for(scope["path"])
+        if cost_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        deadline = None
+        for key, value in scope.get("headers", []):
+            if key == DEADLINE_HEADER:
+                try:
+                    timeout = float(value.decode())
+                except ValueError:
+                    break
+                deadline = time.monotonic() + min(max(timeout, 0.0), MAX_REQUEST_TIMEOUT_SECONDS)
+                break
+
+        limiter = self.limiters[cost_class]
+        try:
+            await limiter.acquire(deadline)
+        except AdmissionRejected as e:
+            headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+            response = JSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        token = set_deadline(deadline)
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_deadline(token)
+            limiter.release(time.monotonic() - started)
@@ -1,8 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import groundwater, rainfall, analysis
+from app.admission import AdmissionControlMiddleware
+from app.routers import groundwater, rainfall, analysis, jobs
+from app.services.job_service import shutdown_job_pool
+from app.services.sql_store import close_pool
 
-app = FastAPI(title="Groundwater Resource Evaluation API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_job_pool()
+    close_pool()
+
+
+app = FastAPI(title="Groundwater Resource Evaluation API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware: configure allowed origins for development and production
 # In production, replace "*" with an explicit list of allowed frontend origins.
@@ -15,6 +27,8 @@ origins = [
     "*",
 ]
 
+# Admission control is added first so CORS headers also wrap 429/503 rejections
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -26,6 +40,7 @@ app.add_middleware(
 app.include_router(groundwater, prefix="/api/v1", tags=["Groundwater"])
 app.include_router(rainfall, prefix="/api/v1", tags=["Rainfall"])
 app.include_router(analysis, prefix="/api/v1", tags=["Analysis"])
+app.include_router(jobs, prefix="/api/v1", tags=["Jobs"])
 
 
 @app.get("/")
@@ -1,7 +1,9 @@
 from .groundwater import router as groundwater_router
 from .rainfall import router as rainfall_router
 from .analysis import router as analysis_router
+from .jobs import router as jobs_router
 
 groundwater = groundwater_router
 rainfall = rainfall_router
-analysis = analysis_router
\ No newline at end of file
+analysis = analysis_router
+jobs = jobs_router
\ No newline at end of file
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, HTTPException
-from app.services.analysis_service import analyze_groundwater, predict_trends
+from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from app.services.analysis_service import (
+    analyze_groundwater,
+    predict_trends,
+    compare_districts,
+    detect_anomalies,
+    validate_idw,
+    ANOMALY_Z_THRESHOLD,
+    ANOMALY_JUMP_THRESHOLD,
+)
+from app.services.deadline import DeadlineExceeded
 
 router = APIRouter()
 
 @router.get("/groundwater-analysis")
-async def get_groundwater_analysis(
+def get_groundwater_analysis(
     state: str,
     district: str,
     agency: str,
@@ -18,11 +28,13 @@ async def get_groundwater_analysis(
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Data error: {str(e)}")
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
 
 @router.get("/groundwater-trends")
-async def get_groundwater_trends(
+def get_groundwater_trends(
     state: str,
     district: str,
     agency: str,
@@ -34,5 +46,78 @@ async def get_groundwater_trends(
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Data error: {str(e)}")
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Trend prediction error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Trend prediction error: {str(e)}")
+
+@router.get("/groundwater-comparison")
+def get_groundwater_comparison(
+    state: str,
+    agency: str = "CGWB",
+    start_year: int = None,
+    end_year: int = None,
+    sort_by: str = "depletion",
+    order: str = "desc",
+    top_k: int = None
+):
+    try:
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        result = compare_districts(state, agency, start_year, end_year, sort_by, order == "desc", top_k)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Data error: {str(e)}")
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Comparison error: {str(e)}")
+
+
+@router.get("/anomalies")
+def get_anomalies(
+    state: str,
+    agency: str = "CGWB",
+    district: str = None,
+    z_threshold: float = ANOMALY_Z_THRESHOLD,
+    jump_threshold: float = ANOMALY_JUMP_THRESHOLD
+):
+    try:
+        result = detect_anomalies(state, agency, district, z_threshold, jump_threshold)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Data error: {str(e)}")
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Anomaly detection error: {str(e)}")
+
+
+def _run_idw_validation(state, agency, powers, radii_km, min_coverage, apply):
+    try:
+        return validate_idw(state, agency, powers, radii_km, min_coverage, apply)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Data error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"IDW validation error: {str(e)}")
+
+@router.get("/idw-validation")
+def get_idw_validation(
+    state: str,
+    agency: str = "CGWB",
+    powers: List[float] = Query(None),
+    radii_km: List[float] = Query(None),
+    min_coverage: float = 0.9
+):
+    return _run_idw_validation(state, agency, powers, radii_km, min_coverage, apply=False)
+
+@router.post("/idw-validation")
+def apply_idw_validation(
+    state: str,
+    agency: str = "CGWB",
+    powers: List[float] = Query(None),
+    radii_km: List[float] = Query(None),
+    min_coverage: float = 0.9
+):
+    """Run the validation and adopt the best power/radius for the state's IDW estimates."""
+    return _run_idw_validation(state, agency, powers, radii_km, min_coverage, apply=True)
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from app.services.wris_api_client import fetch_groundwater_data
 from app.services.analysis_service import estimate_missing_groundwater_idw
+from app.services.deadline import DeadlineExceeded
 
 router = APIRouter()
 
 @router.get("/groundwater")
-async def get_groundwater_data(
+def get_groundwater_data(
     state: str,
     district: str,
     agency: str,
@@ -57,5 +58,7 @@ async def get_groundwater_data(
         return data
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Data error: {str(e)}")
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching data: {str(e)}")
\ No newline at end of file
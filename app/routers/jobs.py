@@ -0,0 +1,127 @@
+import asyncio
+import json
+from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from app.services.job_service import (
+    JobQueueFull,
+    TERMINAL_STATUSES,
+    submit_job,
+    submit_batch_job,
+    get_job,
+    get_job_result,
+)
+
+router = APIRouter()
+
+JOB_EVENT_POLL_SECONDS = 0.5
+
+
+class BatchItem(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+
+
+def _submit_or_raise(submit, *args):
+    try:
+        return JSONResponse(status_code=202, content=submit(*args))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Data error: {str(e)}")
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job submission error: {str(e)}")
+
+
+@router.post("/jobs/groundwater-analysis", status_code=202)
+async def submit_groundwater_analysis_job(
+    state: str,
+    district: str,
+    agency: str,
+    start_date: str,
+    end_date: str,
+    current_date: str = None,
+    period_months: int = 12
+):
+    params = {
+        "state": state,
+        "district": district,
+        "agency": agency,
+        "start_date": start_date,
+        "end_date": end_date,
+        "current_date": current_date,
+        "period_months": period_months,
+    }
+    return _submit_or_raise(submit_job, "analysis", params)
+
+
+@router.post("/jobs/groundwater-trends", status_code=202)
+async def submit_groundwater_trends_job(
+    state: str,
+    district: str,
+    agency: str,
+    historical_months: int = 120,
+    forecast_months: int = 12
+):
+    params = {
+        "state": state,
+        "district": district,
+        "agency": agency,
+        "historical_months": historical_months,
+        "forecast_months": forecast_months,
+    }
+    return _submit_or_raise(submit_job, "trends", params)
+
+
+@router.post("/jobs/batch", status_code=202)
+async def submit_batch(request: BatchRequest):
+    items = [{"kind": item.kind, "params": item.params} for item in request.items]
+    return _submit_or_raise(submit_batch_job, items)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_output(job_id: str):
+    job = get_job_result(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if job["status"] not in TERMINAL_STATUSES:
+        pending = {k: v for k, v in job.items() if k not in ("result", "error_code")}
+        return JSONResponse(status_code=202, content=pending)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["error_code"] or 500, detail=job["error"])
+    return job["result"]
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    if get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def event_stream():
+        last = None
+        while True:
+            job = get_job(job_id)
+            if job is None:
+                yield "event: expired\ndata: {}\n\n"
+                return
+            if job != last:
+                yield f"event: progress\ndata: {json.dumps(job)}\n\n"
+                last = job
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -1,7 +1,13 @@
+import os
+import json
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
-from app.services.wris_api_client import fetch_groundwater_data, fetch_rainfall_data
+from app.services.wris_api_client import fetch_groundwater_data, fetch_rainfall_data, load_groundwater_frame, groundwater_data_version
+from app.services.deadline import check_deadline
 import numpy as np
+import pandas as pd
 from sklearn.linear_model import LinearRegression
 from scipy.spatial.distance import cdist
 from district_coords import DISTRICT_COORDS
@@ -64,16 +70,58 @@ DISTRICT_INFILTRATION = {
 CRITICAL_THRESHOLD = 5.0  # m below ground
 LOW_THRESHOLD = 10.0
 
+# IDW defaults, and per-state parameters adopted from leave-one-out validation
+IDW_DEFAULT_POWER = 2
+IDW_DEFAULT_MAX_DISTANCE_KM = 800.0
+# Adopted parameters live in a JSON file so the server and job-pool worker processes all see them
+IDW_PARAMS_PATH = os.getenv("IDW_PARAMS_PATH", "idw_params.json")
+
+_idw_params_cache: Dict[str, Any] = {"stamp": None, "params": {}}
+_idw_params_lock = threading.Lock()
+
+def _load_idw_parameters() -> Dict[str, Dict[str, float]]:
+    """Per-state adopted IDW parameters, re-read only when the file changes."""
+    try:
+        stat = os.stat(IDW_PARAMS_PATH)
+    except FileNotFoundError:
+        return {}
+    stamp = (IDW_PARAMS_PATH, stat.st_mtime_ns, stat.st_size)
+    if _idw_params_cache["stamp"] != stamp:
+        with open(IDW_PARAMS_PATH) as f:
+            _idw_params_cache["params"] = json.load(f)
+        _idw_params_cache["stamp"] = stamp
+    return _idw_params_cache["params"]
+
+def save_idw_parameters(state: str, power: float, max_distance_km: float):
+    """Adopt IDW parameters for a state; the file is replaced atomically so readers never see a partial write."""
+    with _idw_params_lock:
+        params = dict(_load_idw_parameters())
+        params[state] = {"power": power, "max_distance_km": max_distance_km}
+        tmp_path = f"{IDW_PARAMS_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(params, f, indent=2)
+        os.replace(tmp_path, IDW_PARAMS_PATH)
+
 def get_infiltration_factor(state: str, district: str = None) -> float:
     if state == "West Bengal" and district:
         return DISTRICT_INFILTRATION.get(district, DISTRICT_INFILTRATION.get("default_wb", 0.35))
     return SOIL_COEFFICIENT_MAP.get(state, SOIL_COEFFICIENT_MAP["default"])
 
-def estimate_missing_groundwater_idw(state: str, district: str, year: int, power: int = 2, max_distance_km: float = 800.0):
+def get_idw_parameters(state: str) -> Dict[str, float]:
+    """IDW power and radius for a state: tuned values if adopted, otherwise the defaults."""
+    return _load_idw_parameters().get(state, {"power": IDW_DEFAULT_POWER, "max_distance_km": IDW_DEFAULT_MAX_DISTANCE_KM})
+
+def estimate_missing_groundwater_idw(state: str, district: str, year: int, power: float = None, max_distance_km: float = None):
     """
     Estimate groundwater level for a missing district using Inverse Distance Weighting (IDW).
     max_distance_km is in kilometers using haversine distance.
+    power and max_distance_km default to the state's parameters from get_idw_parameters.
     """
+    params = get_idw_parameters(state)
+    if power is None:
+        power = params["power"]
+    if max_distance_km is None:
+        max_distance_km = params["max_distance_km"]
     if district not in DISTRICT_COORDS:
         return None  # No coordinates, can't estimate
 
@@ -85,6 +133,7 @@ def estimate_missing_groundwater_idw(state: str, district: str, year: int, power
     for d, coord in DISTRICT_COORDS.items():
         if d == district:
             continue
+        check_deadline()
         gw_data = fetch_groundwater_data(state, d, "CGWB", f"{year}-01-01", f"{year}-12-31")
         data_list = gw_data.get('data', [])
         if not data_list:
@@ -210,6 +259,7 @@ def analyze_groundwater(state: str, district: str, agency: str, start_date: str,
             gw_data = {"data": []}
             data_list = []
     
+    check_deadline()
     recharge = calculate_recharge_rate(state, district, agency, start_date, end_date)
     analyzed_data = check_critical_levels(gw_data)
     for item in analyzed_data:
@@ -234,6 +284,7 @@ def predict_trends(state: str, district: str, agency: str, historical_months: in
     levels = []
     has_estimated_levels = False
     for year in range(start_year, current_year):
+        check_deadline()
         data = fetch_groundwater_data(state, district, agency, f"{year}-01-01", f"{year}-12-31")
         data_list = data.get('data', [])
         if not isinstance(data_list, list):
@@ -290,6 +341,365 @@ def predict_trends(state: str, district: str, agency: str, historical_months: in
         "unit": "m/year"
     }
 
+COMPARISON_SORT_KEYS = ("depletion", "trend_slope", "latest_level", "yoy_change")
+
+def build_level_matrix(state: str, agency: str = None, start_year: int = None, end_year: int = None):
+    """
+    Build a district x year matrix of mean groundwater levels for a state.
+    Returns (districts, years, matrix) with NaN where a district has no reading for a year.
+    """
+    df = load_groundwater_frame(state, agency)
+    df = df[df['data_value'].notna()]
+    if start_year is None:
+        start_year = int(df['year'].min()) if not df.empty else datetime.now().year
+    if end_year is None:
+        end_year = int(df['year'].max()) if not df.empty else datetime.now().year
+    if start_year > end_year:
+        raise ValueError("start_year must not be after end_year")
+    df = df[(df['year'] >= start_year) & (df['year'] <= end_year)]
+
+    years = list(range(start_year, end_year + 1))
+    pivot = df.pivot_table(index='district', columns='year', values='data_value', aggfunc='mean')
+    pivot = pivot.reindex(columns=years)
+    return list(pivot.index), years, pivot.to_numpy(dtype=float)
+
+def fit_trend_lines(years: List[int], matrix: np.ndarray):
+    """
+    Least-squares slope and intercept for every row of a level matrix at once, ignoring NaNs.
+    Rows with fewer than two readings get NaN.
+    """
+    x = np.asarray(years, dtype=float)
+    valid = ~np.isnan(matrix)
+    y = np.where(valid, matrix, 0.0)
+    xv = np.where(valid, x, 0.0)
+    n = valid.sum(axis=1)
+    sx = xv.sum(axis=1)
+    sy = y.sum(axis=1)
+    sxx = (xv * xv).sum(axis=1)
+    sxy = (xv * y).sum(axis=1)
+    denom = n * sxx - sx * sx
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = np.where((n >= 2) & (denom != 0), (n * sxy - sx * sy) / denom, np.nan)
+        intercept = np.where(n >= 2, (sy - slope * sx) / n, np.nan)
+    return slope, intercept
+
+def _first_last_valid(matrix: np.ndarray):
+    """Index of the first and last non-NaN column per row (-1 where a row is empty)."""
+    valid = ~np.isnan(matrix)
+    has_any = valid.any(axis=1)
+    first = np.where(has_any, valid.argmax(axis=1), -1)
+    last = np.where(has_any, matrix.shape[1] - 1 - valid[:, ::-1].argmax(axis=1), -1)
+    return first, last
+
+def _classify_levels(levels: np.ndarray) -> np.ndarray:
+    """Vectorized equivalent of check_critical_levels for an array of levels."""
+    status = np.where(levels <= CRITICAL_THRESHOLD, "Critical",
+                      np.where(levels <= LOW_THRESHOLD, "Low", "Normal"))
+    return np.where(np.isnan(levels), None, status)
+
+def _round_or_none(value, digits: int = 4):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+def compare_districts(state: str, agency: str = "CGWB", start_year: int = None, end_year: int = None,
+                      sort_by: str = "depletion", descending: bool = True, top_k: int = None) -> Dict[str, Any]:
+    """Rank all districts of a state by depletion, trend or level using one pass over the level matrix."""
+    if sort_by not in COMPARISON_SORT_KEYS:
+        raise ValueError(f"sort_by must be one of: {', '.join(COMPARISON_SORT_KEYS)}")
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k must be a positive integer")
+
+    districts, years, matrix = build_level_matrix(state, agency, start_year, end_year)
+    if not districts:
+        return {"state": state, "years": years, "sort_by": sort_by, "order": "desc" if descending else "asc",
+                "total_districts": 0, "districts": [], "unit": "m"}
+
+    rows = np.arange(len(districts))
+    year_arr = np.asarray(years)
+    first, last = _first_last_valid(matrix)
+    latest_level = matrix[rows, last]
+    earliest_level = matrix[rows, first]
+    span_years = (year_arr[last] - year_arr[first]).astype(float)
+
+    # Depletion follows calculate_depletion_rate: fall in level per year, floored at zero
+    with np.errstate(invalid='ignore', divide='ignore'):
+        depletion = np.where(span_years > 0, np.maximum((earliest_level - latest_level) / span_years, 0.0), np.nan)
+
+    yoy = np.full_like(matrix, np.nan)
+    yoy[:, 1:] = np.diff(matrix, axis=1)
+    latest_yoy = yoy[rows, last]
+
+    slope, _ = fit_trend_lines(years, matrix)
+    trend_status = np.where(slope < 0, "Declining", np.where(slope > 0, "Recovering", "Stable"))
+    status = _classify_levels(latest_level)
+
+    metric = {"depletion": depletion, "trend_slope": slope, "latest_level": latest_level, "yoy_change": latest_yoy}[sort_by]
+    # Sort with NaN (no data for the metric) always last
+    key = -metric if descending else metric
+    order = np.lexsort((key, np.isnan(metric)))
+    ranks = np.empty(len(order), dtype=int)
+    ranks[order] = np.arange(1, len(order) + 1)
+    if top_k is not None:
+        order = order[:top_k]
+
+    results = []
+    for i in order:
+        results.append({
+            "district": districts[i],
+            "rank": int(ranks[i]),
+            "levels": [_round_or_none(v) for v in matrix[i]],
+            "yoy_change": [_round_or_none(v) for v in yoy[i]],
+            "latest_year": int(year_arr[last[i]]) if last[i] >= 0 else None,
+            "latest_level": _round_or_none(latest_level[i]),
+            "depletion_rate": _round_or_none(depletion[i]),
+            "trend_slope": _round_or_none(slope[i]),
+            "trend_status": str(trend_status[i]) if not np.isnan(slope[i]) else None,
+            "status": str(status[i]) if status[i] is not None else None,
+        })
+
+    return {
+        "state": state,
+        "years": years,
+        "sort_by": sort_by,
+        "order": "desc" if descending else "asc",
+        "total_districts": len(districts),
+        "districts": results,
+        "unit": "m"
+    }
+
+# Anomaly detection defaults: modified z-score cut-off (Iglewicz & Hoaglin) and year-over-year jump in metres
+ANOMALY_Z_THRESHOLD = 3.5
+ANOMALY_JUMP_THRESHOLD = 4.0
+ANOMALY_MIN_READINGS = 4
+ANOMALY_CACHE_SIZE = 32
+
+# (state, agency) -> threshold-independent scores for every district series, tagged with the data version
+_anomaly_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_anomaly_lock = threading.Lock()
+
+def _robust_z(values: np.ndarray, enough: np.ndarray) -> np.ndarray:
+    """Row-wise modified z-score 0.6745 * (x - median) / MAD; NaN where MAD is zero or data is too short."""
+    z = np.full_like(values, np.nan)
+    rows = values[enough]
+    if rows.size:
+        median = np.nanmedian(rows, axis=1, keepdims=True)
+        mad = np.nanmedian(np.abs(rows - median), axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z[enough] = np.where(mad > 0, 0.6745 * (rows - median) / mad, np.nan)
+    return z
+
+def _score_series(years: List[int], matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """Anomaly scores for every reading of every series in one set of array operations."""
+    valid = ~np.isnan(matrix)
+    enough = valid.sum(axis=1) >= ANOMALY_MIN_READINGS
+
+    # Change from the previous available reading, and the change into the next one (to spot spikes)
+    previous = pd.DataFrame(matrix).ffill(axis=1).shift(1, axis=1).to_numpy(dtype=float)
+    delta = matrix - previous
+    next_delta = pd.DataFrame(delta).shift(-1, axis=1).bfill(axis=1).to_numpy(dtype=float)
+
+    slope, intercept = fit_trend_lines(years, matrix)
+    fitted = slope[:, None] * np.asarray(years, dtype=float)[None, :] + intercept[:, None]
+    residual = matrix - fitted
+
+    return {
+        "level_z": _robust_z(matrix, enough),
+        "delta": delta,
+        "next_delta": next_delta,
+        "residual": residual,
+        "residual_z": _robust_z(residual, enough),
+    }
+
+def _flag_anomalies(scores: Dict[str, np.ndarray], z_threshold: float, jump_threshold: float) -> Dict[str, np.ndarray]:
+    """Boolean mask per anomaly reason, applying the thresholds to precomputed scores."""
+    delta, next_delta = scores["delta"], scores["next_delta"]
+    with np.errstate(invalid='ignore'):
+        jump = np.abs(delta) >= jump_threshold
+        return {
+            "level_outlier": np.abs(scores["level_z"]) >= z_threshold,
+            "sudden_change": jump,
+            "spike": jump & (np.abs(next_delta) >= jump_threshold) & (np.sign(delta) != np.sign(next_delta)),
+            "trend_deviation": np.abs(scores["residual_z"]) >= z_threshold,
+        }
+
+def _refresh_anomaly_scores(state: str, agency: str) -> Dict[str, Any]:
+    """
+    Return cached scores for a state, rebuilding them only when the underlying data has changed.
+    On a change, only districts whose readings differ from the cached series are rescored.
+    """
+    key = (state, agency)
+    version = groundwater_data_version()
+    with _anomaly_lock:
+        cache = _anomaly_cache.get(key)
+        if cache is not None and cache["version"] == version:
+            _anomaly_cache.move_to_end(key)
+            return {**cache, "refreshed": 0}
+
+        districts, years, matrix = build_level_matrix(state, agency)
+        scores = {name: np.full_like(matrix, np.nan) for name in ("level_z", "delta", "next_delta", "residual", "residual_z")}
+        changed = list(range(len(districts)))
+        if cache is not None and cache["years"] == years:
+            previous = {d: i for i, d in enumerate(cache["districts"])}
+            changed = []
+            for i, d in enumerate(districts):
+                j = previous.get(d)
+                if j is not None and np.array_equal(cache["levels"][j], matrix[i], equal_nan=True):
+                    for name in scores:
+                        scores[name][i] = cache["scores"][name][j]
+                else:
+                    changed.append(i)
+        if changed:
+            fresh = _score_series(years, matrix[changed])
+            for name in scores:
+                scores[name][changed] = fresh[name]
+
+        cache = {"version": version, "districts": districts, "years": years, "levels": matrix, "scores": scores}
+        if districts:
+            _anomaly_cache[key] = cache
+            _anomaly_cache.move_to_end(key)
+            while len(_anomaly_cache) > ANOMALY_CACHE_SIZE:
+                _anomaly_cache.popitem(last=False)
+        return {**cache, "refreshed": len(changed)}
+
+def detect_anomalies(state: str, agency: str = "CGWB", district: str = None,
+                     z_threshold: float = ANOMALY_Z_THRESHOLD, jump_threshold: float = ANOMALY_JUMP_THRESHOLD) -> Dict[str, Any]:
+    """
+    Flag outliers, sudden jumps, spikes and trend deviations across all district series of a state.
+    Scores are cached per state and recomputed only for series that changed when the data file changes.
+    """
+    if z_threshold <= 0 or jump_threshold <= 0:
+        raise ValueError("z_threshold and jump_threshold must be positive")
+
+    cache = _refresh_anomaly_scores(state, agency)
+    districts, years, levels = cache["districts"], cache["years"], cache["levels"]
+    if district:
+        if district not in districts:
+            raise ValueError(f"No groundwater readings for district '{district}' in {state}")
+        rows = [districts.index(district)]
+    else:
+        rows = list(range(len(districts)))
+
+    scores = {name: values[rows] for name, values in cache["scores"].items()}
+    selected = levels[rows]
+    flags = _flag_anomalies(scores, z_threshold, jump_threshold)
+    flagged = ~np.isnan(selected)
+    any_flag = np.zeros_like(flagged)
+    for mask in flags.values():
+        any_flag |= mask
+
+    anomalies = []
+    for i, j in zip(*np.nonzero(flagged & any_flag)):
+        anomalies.append({
+            "district": districts[rows[i]],
+            "year": years[j],
+            "level": _round_or_none(selected[i, j]),
+            "robust_z": _round_or_none(scores["level_z"][i, j]),
+            "yoy_change": _round_or_none(scores["delta"][i, j]),
+            "trend_residual": _round_or_none(scores["residual"][i, j]),
+            "trend_residual_z": _round_or_none(scores["residual_z"][i, j]),
+            "reasons": [name for name, mask in flags.items() if mask[i, j]],
+        })
+
+    return {
+        "state": state,
+        "years": years,
+        "thresholds": {"z_score": z_threshold, "yoy_change": jump_threshold},
+        "districts_scanned": len(rows),
+        "districts_refreshed": cache["refreshed"],
+        "anomaly_count": len(anomalies),
+        "anomalies": anomalies,
+        "unit": "m"
+    }
+
+IDW_VALIDATION_POWERS = [1.0, 1.5, 2.0, 2.5, 3.0, 4.0]
+IDW_VALIDATION_RADII_KM = [50.0, 100.0, 150.0, 200.0, 300.0, 400.0, 600.0, 800.0]
+
+def _pairwise_haversine(coords: np.ndarray) -> np.ndarray:
+    """Haversine distance matrix (km) between all pairs of (lat, lon) rows."""
+    lat = np.radians(coords[:, 0])
+    lon = np.radians(coords[:, 1])
+    dlat = lat[None, :] - lat[:, None]
+    dlon = lon[None, :] - lon[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return 2 * 6371 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def validate_idw(state: str, agency: str = "CGWB", powers: List[float] = None, radii_km: List[float] = None,
+                 min_coverage: float = 0.9, apply: bool = False) -> Dict[str, Any]:
+    """
+    Leave-one-out validation of IDW over every known (district, year) reading of a state.
+    All power/radius combinations are evaluated together from one distance matrix and one level matrix.
+    With apply=True the best configuration is adopted for the state's future IDW estimates.
+    """
+    powers = sorted(set(powers or IDW_VALIDATION_POWERS))
+    radii_km = sorted(set(radii_km or IDW_VALIDATION_RADII_KM))
+    if any(p <= 0 for p in powers) or any(r <= 0 for r in radii_km):
+        raise ValueError("powers and radii must be positive")
+    if not 0 < min_coverage <= 1:
+        raise ValueError("min_coverage must be in (0, 1]")
+
+    districts, years, matrix = build_level_matrix(state, agency)
+    keep = [i for i, d in enumerate(districts) if d in DISTRICT_COORDS]
+    districts = [districts[i] for i in keep]
+    levels = matrix[keep]
+    known = ~np.isnan(levels)
+    if len(districts) < 2 or not known.any():
+        raise ValueError(f"Not enough districts with coordinates and readings in {state} to validate IDW")
+
+    distances = _pairwise_haversine(np.array([DISTRICT_COORDS[d] for d in districts], dtype=float))
+    p = np.asarray(powers, dtype=float)[:, None, None, None]
+    r = np.asarray(radii_km, dtype=float)[None, :, None, None]
+
+    # Weights for every (power, radius, target, neighbour); the diagonal is zeroed to leave the target out
+    eps = 1e-8
+    weights = (distances[None, None] + eps) ** -p * (distances[None, None] <= r)
+    weights = weights * (1.0 - np.eye(len(districts)))[None, None]
+
+    filled = np.where(known, levels, 0.0)
+    numerator = np.einsum('prij,jt->prit', weights, filled)
+    denominator = np.einsum('prij,jt->prit', weights, known.astype(float))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estimates = np.where(denominator > 0, numerator / denominator, np.nan)
+
+    errors = np.where(known[None, None], estimates - levels[None, None], np.nan)
+    scored = ~np.isnan(errors)
+    errors = np.where(scored, errors, 0.0)
+    estimated = scored.sum(axis=(2, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rmse = np.where(estimated > 0, np.sqrt((errors ** 2).sum(axis=(2, 3)) / estimated), np.nan)
+        mae = np.where(estimated > 0, np.abs(errors).sum(axis=(2, 3)) / estimated, np.nan)
+    coverage = estimated / known.sum()
+
+    configurations = []
+    for i, power in enumerate(powers):
+        for j, radius in enumerate(radii_km):
+            configurations.append({
+                "power": power,
+                "max_distance_km": radius,
+                "rmse": _round_or_none(rmse[i, j]),
+                "mae": _round_or_none(mae[i, j]),
+                "estimated_points": int(estimated[i, j]),
+                "coverage": round(float(coverage[i, j]), 4),
+            })
+    configurations.sort(key=lambda c: (c["rmse"] is None, c["rmse"] if c["rmse"] is not None else 0.0))
+
+    eligible = [c for c in configurations if c["rmse"] is not None and c["coverage"] >= min_coverage]
+    best = eligible[0] if eligible else None
+    if apply:
+        if best is None:
+            raise ValueError(f"No configuration reaches the minimum coverage of {min_coverage}")
+        save_idw_parameters(state, best["power"], best["max_distance_km"])
+
+    return {
+        "state": state,
+        "districts": len(districts),
+        "known_points": int(known.sum()),
+        "min_coverage": min_coverage,
+        "best": best,
+        "applied": apply,
+        "current_parameters": get_idw_parameters(state),
+        "configurations": configurations,
+        "unit": "m"
+    }
+
 # Add haversine distance function for geographic accuracy
 def haversine_distance(coord1, coord2):
     """
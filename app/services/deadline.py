@@ -0,0 +1,32 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Monotonic deadline for the current request, set by the admission middleware from X-Request-Timeout.
+# Context variables follow the request into FastAPI's threadpool, so long-running service loops can
+# stop working for a client that has already given up.
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def set_deadline(deadline: Optional[float]):
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline():
+    """Raise DeadlineExceeded if the current request's deadline has passed; no-op without a deadline."""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
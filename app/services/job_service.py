@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import inspect
+import threading
+import multiprocessing
+from typing import Dict, Any, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.services.analysis_service import analyze_groundwater, predict_trends
+
+# Process pool sizing and result retention (override via environment variables)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(min(4, os.cpu_count() or 1))))
+JOB_MAX_PENDING_TASKS = int(os.getenv("JOB_MAX_PENDING_TASKS", "256"))
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+MAX_BATCH_ITEMS = 200
+
+# Job kinds that can be executed in the pool; each maps to a picklable top-level function
+JOB_TASKS = {
+    "analysis": analyze_groundwater,
+    "trends": predict_trends,
+}
+
+# Defaults that differ from the task function's signature, so jobs match the inline endpoints
+# (/groundwater-trends fits 10 years of history, while predict_trends itself defaults to 2)
+JOB_PARAM_DEFAULTS = {
+    "trends": {"historical_months": 120},
+}
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_inflight: Dict[str, str] = {}  # dedup key -> job id for queued/running jobs
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawn fresh workers rather than forking the threaded server process, which would copy
+        # open SQLite connections and possibly-held locks into the children
+        _pool = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _reset_broken_pool(broken: ProcessPoolExecutor):
+    # A worker died (OOM, segfault, failed spawn) and the executor refuses new work; replace it
+    global _pool
+    with _lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit_tasks(tasks: List[Dict[str, Any]]) -> list:
+    for attempt in range(2):
+        with _lock:
+            pool = _get_pool()
+        futures = []
+        try:
+            for task in tasks:
+                futures.append(pool.submit(JOB_TASKS[task["kind"]], **task["params"]))
+            return futures
+        except BrokenProcessPool:
+            for future in futures:
+                future.cancel()
+            _reset_broken_pool(pool)
+            if attempt:
+                raise
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def shutdown_job_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _validate_task(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    if kind not in JOB_TASKS:
+        raise ValueError(f"Unknown job kind '{kind}'. Expected one of: {', '.join(JOB_TASKS)}")
+    signature = inspect.signature(JOB_TASKS[kind])
+    params = {**JOB_PARAM_DEFAULTS.get(kind, {}), **params}
+    try:
+        bound = signature.bind(**params)
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for '{kind}' job: {e}")
+    # Fill in defaults so omitted and explicit default values deduplicate to the same job
+    bound.apply_defaults()
+
+    # Check types here so bad input is a 400 at submission rather than a failure inside a worker
+    for name, value in bound.arguments.items():
+        parameter = signature.parameters[name]
+        expected = parameter.annotation
+        if value is None and parameter.default is None:
+            continue
+        if expected is float:
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        elif expected in (int, str):
+            valid = isinstance(value, expected) and not isinstance(value, bool)
+        else:
+            valid = True
+        if not valid:
+            raise ValueError(f"Invalid parameters for '{kind}' job: '{name}' must be of type {expected.__name__}")
+    return dict(bound.arguments)
+
+
+def _dedup_key(kind: str, tasks: List[Dict[str, Any]]) -> str:
+    payload = json.dumps({"kind": kind, "tasks": tasks}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _purge_expired(now: float):
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job["status"] in TERMINAL_STATUSES and now - job["finished_at"] > JOB_RESULT_TTL_SECONDS
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def _on_task_done(job_id: str, index: int, future):
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        try:
+            outcome = {"status": "completed", "result": future.result()}
+        except ValueError as e:
+            outcome = {"status": "failed", "error": f"Data error: {str(e)}", "error_code": 400}
+        except Exception as e:
+            outcome = {"status": "failed", "error": f"Job error: {str(e)}", "error_code": 500}
+        job["_outcomes"][index] = outcome
+        job["progress"]["completed"] += 1
+
+        if job["progress"]["completed"] < job["progress"]["total"]:
+            return
+
+        if job["kind"] == "batch":
+            # Per-item failures are reported inside the batch result
+            job["status"] = "completed"
+            job["result"] = [
+                {**job["_tasks"][i], **job["_outcomes"][i]} for i in range(len(job["_tasks"]))
+            ]
+        else:
+            single = job["_outcomes"][0]
+            job["status"] = single["status"]
+            job["result"] = single.get("result")
+            job["error"] = single.get("error")
+            job["error_code"] = single.get("error_code")
+        job["finished_at"] = time.time()
+        job["_futures"] = []
+        if _inflight.get(job["key"]) == job_id:
+            del _inflight[job["key"]]
+
+
+def _submit(kind: str, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    key = _dedup_key(kind, tasks)
+    with _lock:
+        now = time.time()
+        _purge_expired(now)
+
+        existing = _inflight.get(key)
+        if existing is not None and existing in _jobs:
+            return _snapshot(_jobs[existing], deduplicated=True)
+
+        # Bound outstanding pool tasks (not jobs), so large batches cannot flood the executor queue
+        pending = sum(
+            job["progress"]["total"] - job["progress"]["completed"]
+            for job in _jobs.values() if job["status"] not in TERMINAL_STATUSES
+        )
+        if pending + len(tasks) > JOB_MAX_PENDING_TASKS:
+            raise JobQueueFull(f"Too many pending tasks ({pending}); retry later")
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "key": key,
+            "status": "queued",
+            "progress": {"completed": 0, "total": len(tasks)},
+            "created_at": now,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "error_code": None,
+            "_tasks": tasks,
+            "_outcomes": [None] * len(tasks),
+            "_futures": [],
+        }
+        _jobs[job_id] = job
+        _inflight[key] = job_id
+
+    try:
+        futures = _submit_tasks(tasks)
+    except Exception:
+        with _lock:
+            _jobs.pop(job_id, None)
+            _inflight.pop(key, None)
+        raise
+    with _lock:
+        if job["status"] not in TERMINAL_STATUSES:
+            job["_futures"] = futures
+    for index, future in enumerate(futures):
+        future.add_done_callback(lambda f, i=index: _on_task_done(job_id, i, f))
+
+    with _lock:
+        return _snapshot(job)
+
+
+def submit_job(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Submit a single analysis or trends computation to the process pool."""
+    params = _validate_task(kind, params)
+    return _submit(kind, [{"kind": kind, "params": params}])
+
+
+def submit_batch_job(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Submit several analysis/trends computations as one job with per-item progress."""
+    if not items:
+        raise ValueError("Batch job requires at least one item")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise ValueError(f"Batch job supports at most {MAX_BATCH_ITEMS} items")
+    tasks = []
+    for item in items:
+        kind = item.get("kind")
+        params = _validate_task(kind, item.get("params") or {})
+        tasks.append({"kind": kind, "params": params})
+    return _submit("batch", tasks)
+
+
+def _snapshot(job: Dict[str, Any], deduplicated: bool = False) -> Dict[str, Any]:
+    status = job["status"]
+    if status == "queued" and any(f.running() or f.done() for f in job["_futures"]):
+        status = "running"
+    snapshot = {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": status,
+        "progress": dict(job["progress"]),
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+        "error": job["error"],
+    }
+    if job["finished_at"] is not None:
+        snapshot["expires_at"] = job["finished_at"] + JOB_RESULT_TTL_SECONDS
+    if deduplicated:
+        snapshot["deduplicated"] = True
+    return snapshot
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return the current status/progress of a job, or None if unknown or expired."""
+    with _lock:
+        _purge_expired(time.time())
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job is not None else None
+
+
+def get_job_result(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return the job snapshot together with its result and error code once finished."""
+    with _lock:
+        _purge_expired(time.time())
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        snapshot = _snapshot(job)
+        snapshot["result"] = job["result"]
+        snapshot["error_code"] = job["error_code"]
+        return snapshot
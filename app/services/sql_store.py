@@ -0,0 +1,148 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+import pandas as pd
+
+# Embedded SQLite storage for the groundwater/rainfall datasets.
+# Tables are (re)built from the CSV files whenever a CSV is newer than its table.
+SQLITE_PATH = os.getenv("SQLITE_PATH", "wris_data.db")
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+
+TABLE_COLUMNS = {
+    "groundwater": ["state", "district", "agency", "year", "data_value", "well_depth", "data_time", "unit"],
+    "rainfall": ["state", "district", "agency", "year", "data_value", "data_time", "unit"],
+}
+COLUMN_TYPES = {"year": "INTEGER", "data_value": "REAL", "well_depth": "REAL"}
+
+_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+_pool_created = 0
+_pool_lock = threading.Lock()
+_build_lock = threading.Lock()
+_tables: Dict[str, Dict[str, Any]] = {}  # table -> {"mtime": ..., "columns": [...]} as last verified
+
+
+def _connect() -> sqlite3.Connection:
+    # Autocommit mode: reads run without holding a transaction, rebuilds use explicit BEGIN/COMMIT
+    conn = sqlite3.connect(SQLITE_PATH, check_same_thread=False, timeout=30, cached_statements=256,
+                           isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+@contextmanager
+def _connection():
+    """Borrow a connection from the shared pool, creating one while under the pool size."""
+    global _pool_created
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        with _pool_lock:
+            create = _pool_created < SQLITE_POOL_SIZE
+            if create:
+                _pool_created += 1
+        conn = _connect() if create else _pool.get()
+    try:
+        yield conn
+    finally:
+        _pool.put(conn)
+
+
+def close_pool():
+    global _pool_created
+    with _pool_lock:
+        while True:
+            try:
+                _pool.get_nowait().close()
+            except queue.Empty:
+                break
+        _pool_created = 0
+    _tables.clear()
+
+
+def _build_table(conn: sqlite3.Connection, table: str, csv_path: str, mtime: float) -> List[str]:
+    df = pd.read_csv(csv_path)
+    columns = [c for c in TABLE_COLUMNS[table] if c in df.columns]
+    column_defs = ", ".join(f"{c} {COLUMN_TYPES.get(c, 'TEXT')}" for c in TABLE_COLUMNS[table])
+    rows = df[columns].astype(object).where(df[columns].notna(), None).itertuples(index=False, name=None)
+
+    conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute(f"CREATE TABLE {table} ({column_defs})")
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        list(rows),
+    )
+    # Index on (state, district, agency, year), leaving out agency when the source does not record it
+    index_columns = [c for c in ("state", "district", "agency", "year") if c in columns]
+    conn.execute(f"CREATE INDEX idx_{table}_lookup ON {table} ({', '.join(index_columns)})")
+    conn.execute(
+        "INSERT OR REPLACE INTO source_meta (table_name, source_mtime, columns) VALUES (?, ?, ?)",
+        (table, mtime, ",".join(columns)),
+    )
+    return columns
+
+
+def _ensure_table(table: str, csv_path: str) -> Optional[List[str]]:
+    """Make sure a table reflects its CSV; returns the CSV's columns, or None if the CSV is missing."""
+    if not os.path.exists(csv_path):
+        return None
+    mtime = os.path.getmtime(csv_path)
+    known = _tables.get(table)
+    if known is not None and known["mtime"] == mtime:
+        return known["columns"]
+
+    with _build_lock, _connection() as conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS source_meta (table_name TEXT PRIMARY KEY, source_mtime REAL, columns TEXT)"
+        )
+        # Take the write lock before re-checking so concurrent processes build each table only once
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            meta = conn.execute(
+                "SELECT source_mtime, columns FROM source_meta WHERE table_name = ?", (table,)
+            ).fetchone()
+            if meta is not None and meta["source_mtime"] == mtime:
+                columns = meta["columns"].split(",")
+            else:
+                columns = _build_table(conn, table, csv_path, mtime)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    _tables[table] = {"mtime": mtime, "columns": columns}
+    return columns
+
+
+def query_rows(table: str, csv_path: str, state: str, district: str, agency: str,
+               start_year: int, end_year: int, limit: int, offset: int) -> Optional[List[Dict[str, Any]]]:
+    """Indexed lookup of one district's rows in a year range, paginated in file order."""
+    columns = _ensure_table(table, csv_path)
+    if columns is None:
+        return None
+    # Agency is only filtered when the source data records it, matching the CSV backend
+    agency_clause = "AND agency = ?" if "agency" in columns else ""
+    params = [state, district] + ([agency] if "agency" in columns else []) + [start_year, end_year, limit, offset]
+    sql = (
+        f"SELECT {', '.join(columns)} FROM {table} "
+        f"WHERE state = ? AND district = ? {agency_clause} AND year BETWEEN ? AND ? "
+        f"ORDER BY rowid LIMIT ? OFFSET ?"
+    )
+    with _connection() as conn:
+        return [dict(row) for row in conn.execute(sql, params)]
+
+
+def query_state_frame(table: str, csv_path: str, state: str, agency: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """All rows for a state (and agency, where recorded) as a DataFrame."""
+    columns = _ensure_table(table, csv_path)
+    if columns is None:
+        return None
+    sql = f"SELECT {', '.join(columns)} FROM {table} WHERE state = ?"
+    params = [state]
+    if agency and "agency" in columns:
+        sql += " AND agency = ?"
+        params.append(agency)
+    with _connection() as conn:
+        return pd.read_sql_query(sql + " ORDER BY rowid", conn, params=params)
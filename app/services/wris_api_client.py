@@ -1,29 +1,76 @@
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
+from app.services import sql_store
 
-def fetch_groundwater_data(state: str, district: str, agency: str, start_date: str, end_date: str, page: int = 0, size: int = 1000) -> Dict[str, Any]:
-    if not os.path.exists('groundwater_data.csv'):
-        return {"statusCode": 404, "message": "Groundwater data file not found", "data": []}
-    
-    df = pd.read_csv('groundwater_data.csv')
+GROUNDWATER_CSV = 'groundwater_data.csv'
+RAINFALL_CSV = 'rainfall_data.csv'
+
+# Storage backend for the fetch functions: "csv" (in-memory pandas) or "sqlite" (indexed embedded database)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "csv").lower()
+if DATA_BACKEND not in ("csv", "sqlite"):
+    raise ValueError(f"Unsupported DATA_BACKEND '{DATA_BACKEND}'; expected 'csv' or 'sqlite'")
+
+_frame_cache: Dict[str, Any] = {}
+
+def _read_csv_cached(path: str) -> pd.DataFrame:
+    """Read a data file once and reuse it until the file's modification time changes."""
+    mtime = os.path.getmtime(path)
+    cached = _frame_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, pd.read_csv(path))
+        _frame_cache[path] = cached
+    return cached[1]
+
+def _filter_rows(table: str, csv_path: str, state: str, district: str, agency: str, start_date: str, end_date: str, page: int, size: int) -> Optional[List[Dict[str, Any]]]:
+    """Rows for one district and year range from the configured backend, or None if the data file is missing."""
+    start_year = int(start_date[:4])
+    end_year = int(end_date[:4])
+    if DATA_BACKEND == "sqlite":
+        return sql_store.query_rows(table, csv_path, state, district, agency, start_year, end_year, size, page * size)
+
+    if not os.path.exists(csv_path):
+        return None
+    df = _read_csv_cached(csv_path)
     # Filter by state, district, agency
     filtered = df[(df['state'] == state) & (df['district'] == district)]
     if 'agency' in df.columns:
         filtered = filtered[filtered['agency'] == agency]
     # Since data is yearly, filter by year range if possible
     if 'year' in filtered.columns:
-        start_year = int(start_date[:4])
-        end_year = int(end_date[:4])
         filtered = filtered[(filtered['year'] >= start_year) & (filtered['year'] <= end_year)]
-    
+
     # Paginate
     start_idx = page * size
     end_idx = start_idx + size
-    paginated = filtered.iloc[start_idx:end_idx]
+    return filtered.iloc[start_idx:end_idx].to_dict('records')
+
+def groundwater_data_version() -> Optional[float]:
+    """Modification time of the groundwater CSV, which both backends are built from (None if missing)."""
+    return os.path.getmtime(GROUNDWATER_CSV) if os.path.exists(GROUNDWATER_CSV) else None
+
+def load_groundwater_frame(state: str, agency: Optional[str] = None) -> pd.DataFrame:
+    """Return all groundwater rows for a state (and agency, where recorded) as a DataFrame."""
+    empty = pd.DataFrame(columns=['state', 'district', 'year', 'data_value'])
+    if DATA_BACKEND == "sqlite":
+        df = sql_store.query_state_frame("groundwater", GROUNDWATER_CSV, state, agency)
+        return empty if df is None else df
+
+    if not os.path.exists(GROUNDWATER_CSV):
+        return empty
+    df = _read_csv_cached(GROUNDWATER_CSV)
+    filtered = df[df['state'] == state]
+    if agency and 'agency' in df.columns:
+        filtered = filtered[filtered['agency'] == agency]
+    return filtered
+
+def fetch_groundwater_data(state: str, district: str, agency: str, start_date: str, end_date: str, page: int = 0, size: int = 1000) -> Dict[str, Any]:
+    rows = _filter_rows("groundwater", GROUNDWATER_CSV, state, district, agency, start_date, end_date, page, size)
+    if rows is None:
+        return {"statusCode": 404, "message": "Groundwater data file not found", "data": []}
     
     data = []
-    for _, row in paginated.iterrows():
+    for row in rows:
         data.append({
             "dataTime": row.get('data_time', ''),
             "dataValue": None if pd.isna(row.get('data_value')) else row.get('data_value', 0),
@@ -45,27 +92,12 @@ def fetch_groundwater_data(state: str, district: str, agency: str, start_date: s
     }
 
 def fetch_rainfall_data(state: str, district: str, agency: str, start_date: str, end_date: str, page: int = 0, size: int = 1000) -> Dict[str, Any]:
-    if not os.path.exists('rainfall_data.csv'):
+    rows = _filter_rows("rainfall", RAINFALL_CSV, state, district, agency, start_date, end_date, page, size)
+    if rows is None:
         return {"statusCode": 404, "message": "Rainfall data file not found", "data": []}
     
-    df = pd.read_csv('rainfall_data.csv')
-    # Filter by state, district, agency
-    filtered = df[(df['state'] == state) & (df['district'] == district)]
-    if 'agency' in df.columns:
-        filtered = filtered[filtered['agency'] == agency]
-    # Filter by year
-    if 'year' in filtered.columns:
-        start_year = int(start_date[:4])
-        end_year = int(end_date[:4])
-        filtered = filtered[(filtered['year'] >= start_year) & (filtered['year'] <= end_year)]
-    
-    # Paginate
-    start_idx = page * size
-    end_idx = start_idx + size
-    paginated = filtered.iloc[start_idx:end_idx]
-    
     data = []
-    for _, row in paginated.iterrows():
+    for row in rows:
         data.append({
             "dataTime": row.get('data_time', ''),
             "dataValue": None if pd.isna(row.get('data_value')) else row.get('data_value', 0),
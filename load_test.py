@@ -0,0 +1,234 @@
+"""
+Concurrent load test for the Groundwater Resource Evaluation API.
+
+Replays a weighted mix of groundwater, rainfall, analysis and trends requests
+at a target concurrency (and optionally a target request rate), then reports
+throughput, latency percentiles and error rates per endpoint.
+
+Examples:
+    python load_test.py                                   # run against the app in-process
+    python load_test.py --url http://127.0.0.1:8000 --concurrency 32 --rps 50 --duration 60
+    python load_test.py --mix groundwater=5,rainfall=5,groundwater-trends=1 --label build-42
+    python load_test.py --compare load_test_results/build-41.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+DEFAULT_MIX = "groundwater=4,rainfall=4,groundwater-analysis=1,groundwater-trends=1"
+DEFAULT_STATE = "West Bengal"
+DEFAULT_DISTRICTS = ["Bankura", "Kolkata", "Nadia", "Purulia", "Darjeeling", "Malda", "Howrah", "Birbhum"]
+RESULTS_DIR = "load_test_results"
+
+
+def build_params(endpoint, state, district, year):
+    """Query parameters for one request, matching the API's endpoint signatures."""
+    if endpoint == "groundwater":
+        return {"state": state, "district": district, "agency": "CGWB",
+                "start_date": f"{year}-01-01", "end_date": f"{year}-12-31"}
+    if endpoint == "rainfall":
+        return {"state": state, "district": district, "agency": "CGWB",
+                "start_date": "2024-01-01", "end_date": "2024-12-31"}
+    if endpoint == "groundwater-analysis":
+        return {"state": state, "district": district, "agency": "CGWB",
+                "start_date": f"{year}-01-01", "end_date": f"{year}-12-31", "period_months": 12}
+    if endpoint == "groundwater-trends":
+        return {"state": state, "district": district, "agency": "CGWB",
+                "historical_months": 120, "forecast_months": 12}
+    raise ValueError(f"Unknown endpoint '{endpoint}'")
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    for name in weights:
+        build_params(name, DEFAULT_STATE, DEFAULT_DISTRICTS[0], 2023)  # validates endpoint names
+    return weights
+
+
+def make_client(url, timeout):
+    if url:
+        return httpx.AsyncClient(base_url=url.rstrip("/"), timeout=timeout)
+    # In-process: drive the ASGI app directly without a network hop
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+
+
+async def run_load(args):
+    weights = parse_mix(args.mix)
+    names = list(weights)
+    probs = [weights[n] for n in names]
+    rng = random.Random(args.seed)
+    # With a target rate the queue is unbounded so the producer keeps to schedule; a server that
+    # cannot keep up then shows as backlog in the measured latency instead of a slower send rate
+    queue = asyncio.Queue(maxsize=0 if args.rps else args.concurrency * 2)
+    samples = {name: [] for name in names}  # (latency_seconds, ok)
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    async def producer():
+        issued = 0
+        interval = 1.0 / args.rps if args.rps else 0.0
+        next_at = time.perf_counter()
+        while True:
+            if args.requests and issued >= args.requests:
+                break
+            if deadline and time.perf_counter() >= deadline:
+                break
+            scheduled = None
+            if interval:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                scheduled = next_at
+                next_at += interval
+            endpoint = rng.choices(names, probs)[0]
+            params = build_params(endpoint, args.state, rng.choice(args.districts), rng.choice(args.years))
+            await queue.put((endpoint, params, scheduled))
+            issued += 1
+        for _ in range(args.concurrency):
+            await queue.put(None)
+
+    async def worker(client):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            endpoint, params, scheduled = item
+            # Measure from the intended send time so client-side queueing is not omitted
+            start = scheduled if scheduled is not None else time.perf_counter()
+            try:
+                response = await client.get(f"/api/v1/{endpoint}", params=params)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            samples[endpoint].append((time.perf_counter() - start, ok))
+
+    async with make_client(args.url, args.timeout) as client:
+        started = time.perf_counter()
+        await asyncio.gather(producer(), *(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(samples, elapsed, args.rps)
+
+
+def _stats(entries, elapsed):
+    if not entries:
+        return {"requests": 0}
+    latencies = np.array([latency for latency, _ in entries]) * 1000.0
+    errors = sum(1 for _, ok in entries if not ok)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(entries),
+        "errors": errors,
+        "error_rate": round(errors / len(entries), 4),
+        "throughput_rps": round(len(entries) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(float(latencies.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(latencies.max()), 2),
+    }
+
+
+def summarize(samples, elapsed, target_rps=0):
+    endpoints = {name: _stats(entries, elapsed) for name, entries in samples.items()}
+    everything = [entry for entries in samples.values() for entry in entries]
+    overall = _stats(everything, elapsed)
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "target_rps": target_rps or None,
+        "achieved_rps": overall.get("throughput_rps", 0.0),
+        "overall": overall,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report, baseline=None):
+    header = f"{'endpoint':<22}{'reqs':>7}{'err%':>7}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, s in rows:
+        if not s.get("requests"):
+            print(f"{name:<22}{0:>7}")
+            continue
+        print(f"{name:<22}{s['requests']:>7}{s['error_rate'] * 100:>6.1f}%{s['throughput_rps']:>9.1f}"
+              f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+
+    if report.get("target_rps"):
+        print(f"\nTarget {report['target_rps']:.1f} rps, achieved {report['achieved_rps']:.1f} rps")
+        if report["achieved_rps"] < 0.95 * report["target_rps"]:
+            print("WARNING: target rate not sustained; latencies include time queued behind the schedule")
+
+    if baseline:
+        print(f"\nChange vs baseline '{baseline.get('label')}':")
+        base_rows = dict(baseline["endpoints"], overall=baseline["overall"])
+        for name, s in rows:
+            b = base_rows.get(name)
+            if not s.get("requests") or not b or not b.get("requests"):
+                continue
+            deltas = []
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+                if b[key]:
+                    deltas.append(f"{key} {(s[key] - b[key]) / b[key] * 100:+.1f}%")
+            deltas.append(f"error_rate {(s['error_rate'] - b['error_rate']) * 100:+.2f}pp")
+            print(f"  {name:<20} " + ", ".join(deltas))
+
+
+def save_report(report, label):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the Groundwater Resource Evaluation API")
+    parser.add_argument("--url", help="Base URL of a running server; omit to run the app in-process")
+    parser.add_argument("--concurrency", type=int, default=16, help="Number of concurrent clients")
+    parser.add_argument("--rps", type=float, default=0, help="Target requests per second (0 = as fast as possible)")
+    parser.add_argument("--duration", type=float, default=30, help="Test duration in seconds (0 = use --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="Total number of requests (0 = use --duration)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted endpoint mix, e.g. groundwater=4,rainfall=4")
+    parser.add_argument("--state", default=DEFAULT_STATE)
+    parser.add_argument("--districts", type=lambda s: s.split(","), default=DEFAULT_DISTRICTS)
+    parser.add_argument("--years", type=lambda s: [int(y) for y in s.split(",")], default=[2021, 2022, 2023, 2024])
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="Name for the saved results file (default: timestamp)")
+    parser.add_argument("--compare", help="Path to a previous results file to compare against")
+    args = parser.parse_args()
+    if not args.duration and not args.requests:
+        parser.error("one of --duration or --requests must be non-zero")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    label = args.label or datetime.now().strftime("%Y%m%d-%H%M%S")
+    target = args.url or "in-process app"
+    print(f"Load testing {target}: concurrency={args.concurrency}, rps={args.rps or 'max'}, mix={args.mix}\n")
+
+    report = asyncio.run(run_load(args))
+    report.update({
+        "label": label,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("label", "compare")},
+    })
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nResults saved to {save_report(report, label)}")
@@ -0,0 +1,12 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def _run_from_project_root(monkeypatch):
+    # Data files are resolved relative to the working directory, as when running uvicorn
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,200 @@
+import sys
+import time
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from app import admission
+from app.admission import AdmissionControlMiddleware, AdmissionRejected, ConcurrencyLimiter
+from app.routers import analysis, groundwater, rainfall
+from app.services.deadline import check_deadline
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_queue_overflow_is_rejected_with_429():
+    async def scenario():
+        limiter = ConcurrencyLimiter("expensive", concurrency=1, queue=1, queue_timeout=5.0)
+        await limiter.acquire(None)
+        waiting = asyncio.create_task(limiter.acquire(None))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire(None)
+        limiter.release(0.1)
+        await waiting
+        limiter.release(0.1)
+        return rejected.value, limiter
+
+    rejected, limiter = run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+    assert limiter.active == 0
+
+
+def test_queue_timeout_is_rejected_with_503_and_retry_after():
+    async def scenario():
+        limiter = ConcurrencyLimiter("expensive", concurrency=1, queue=4, queue_timeout=0.05)
+        await limiter.acquire(None)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire(None)
+        limiter.release(0.1)
+        return rejected.value, limiter
+
+    rejected, limiter = run(scenario())
+    assert rejected.status_code == 503
+    assert rejected.retry_after >= 1
+    assert limiter.active == 0 and not limiter._waiters
+
+
+def test_expired_deadline_while_queued_is_rejected_with_504():
+    async def scenario():
+        limiter = ConcurrencyLimiter("expensive", concurrency=1, queue=4, queue_timeout=5.0)
+        await limiter.acquire(None)
+        with pytest.raises(AdmissionRejected) as expired:
+            await limiter.acquire(time.monotonic() - 1)
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await limiter.acquire(time.monotonic() + 0.05)
+        return expired.value, timed_out.value
+
+    expired, timed_out = run(scenario())
+    assert expired.status_code == 504
+    assert timed_out.status_code == 504
+
+
+def test_release_hands_slot_to_next_waiter():
+    async def scenario():
+        limiter = ConcurrencyLimiter("cheap", concurrency=1, queue=4, queue_timeout=5.0)
+        await limiter.acquire(None)
+        waiting = asyncio.create_task(limiter.acquire(None))
+        await asyncio.sleep(0)
+        limiter.release(0.1)
+        await waiting
+        handed_over = limiter.active
+        limiter.release(0.1)
+        return handed_over, limiter.active
+
+    assert run(scenario()) == (1, 0)
+
+
+def test_cancelled_waiter_does_not_leak_slots():
+    async def scenario():
+        limiter = ConcurrencyLimiter("cheap", concurrency=1, queue=4, queue_timeout=5.0)
+        await limiter.acquire(None)
+
+        # Cancelled while still queued: simply leaves the queue
+        queued = asyncio.create_task(limiter.acquire(None))
+        await asyncio.sleep(0)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert not limiter._waiters
+
+        # Cancelled right after the slot was handed over: the slot is either given back or owned
+        handed = asyncio.create_task(limiter.acquire(None))
+        await asyncio.sleep(0)
+        limiter.release(0.1)
+        handed.cancel()
+        try:
+            await handed
+            limiter.release(0.1)  # on Python < 3.12 wait_for may complete despite the cancel
+        except asyncio.CancelledError:
+            pass
+        return limiter.active
+
+    assert run(scenario()) == 0
+
+
+def test_timeout_racing_with_handoff_keeps_the_slot(monkeypatch):
+    async def raise_timeout_after_handoff(waiter, timeout):
+        limiter.release(0.1)  # slot handed over ...
+        raise asyncio.TimeoutError  # ... but wait_for still reports a timeout (Python 3.12+)
+
+    limiter = ConcurrencyLimiter("cheap", concurrency=1, queue=4, queue_timeout=5.0)
+
+    async def scenario():
+        await limiter.acquire(None)
+        monkeypatch.setattr(admission.asyncio, "wait_for", raise_timeout_after_handoff)
+        await limiter.acquire(None)  # must not raise: the handed-over slot is ours
+        monkeypatch.undo()
+        limiter.release(0.1)
+        return limiter.active
+
+    assert run(scenario()) == 0
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    monkeypatch.setenv("ADMISSION_EXPENSIVE_CONCURRENCY", "1")
+    monkeypatch.setenv("ADMISSION_EXPENSIVE_QUEUE", "1")
+    monkeypatch.setenv("ADMISSION_EXPENSIVE_QUEUE_TIMEOUT", "0.2")
+
+    def slow_predict_trends(*args, **kwargs):
+        for _ in range(10):
+            time.sleep(0.05)
+            check_deadline()
+        return {"trend_slope": 0.0}
+
+    # app.routers re-exports the routers under the module names, so patch the module itself
+    monkeypatch.setattr(sys.modules["app.routers.analysis"], "predict_trends", slow_predict_trends)
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware)
+    app.include_router(analysis, prefix="/api/v1")
+    app.include_router(rainfall, prefix="/api/v1")
+    return app
+
+
+def test_middleware_sheds_expensive_load_but_serves_cheap_requests(limited_app):
+    trends = {"state": "West Bengal", "district": "Bankura", "agency": "CGWB"}
+    cheap = dict(trends, start_date="2024-01-01", end_date="2024-12-31")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=limited_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            expensive = [
+                asyncio.create_task(client.get("/api/v1/groundwater-trends", params=trends)) for _ in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            cheap_response = await client.get("/api/v1/rainfall", params=cheap)
+            cheap_seconds = time.perf_counter() - started
+            return await asyncio.gather(*expensive), cheap_response, cheap_seconds
+
+    responses, cheap_response, cheap_seconds = run(scenario())
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses == [200, 429, 503]
+    for r in responses:
+        if r.status_code in (429, 503):
+            assert int(r.headers["Retry-After"]) >= 1
+    assert cheap_response.status_code == 200
+    assert cheap_seconds < 0.25
+
+
+def test_middleware_deadline_aborts_running_work(limited_app):
+    params = {"state": "West Bengal", "district": "Bankura", "agency": "CGWB"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=limited_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/v1/groundwater-trends", params=params, headers={"X-Request-Timeout": "0.1"})
+
+    response = run(scenario())
+    assert response.status_code == 504
+
+
+def test_groundwater_idw_fallback_honours_deadline():
+    # No readings for the year, so the route falls back to IDW, which checks the deadline per district
+    params = {"state": "West Bengal", "district": "Bankura", "agency": "CGWB",
+              "start_date": "1990-01-01", "end_date": "1990-12-31"}
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware)
+    app.include_router(groundwater, prefix="/api/v1")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/v1/groundwater", params=params, headers={"X-Request-Timeout": "0"})
+
+    response = run(scenario())
+    assert response.status_code == 504
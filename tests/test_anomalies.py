@@ -0,0 +1,59 @@
+import numpy as np
+from app.services import analysis_service
+from app.services.analysis_service import _score_series, _flag_anomalies, detect_anomalies
+
+
+def test_bankura_glitch_is_flagged_as_spike():
+    # Bankura 2012-2014 readings followed by a stable series
+    years = list(range(2012, 2020))
+    matrix = np.array([[3.86, 8.24, 2.04, 2.5, 2.7, 2.6, 2.9, 2.8]])
+    flags = _flag_anomalies(_score_series(years, matrix), z_threshold=3.5, jump_threshold=4.0)
+
+    assert flags["spike"][0].tolist() == [False, True, False, False, False, False, False, False]
+    assert flags["sudden_change"][0, 1] and flags["sudden_change"][0, 2]
+    assert not flags["sudden_change"][0, 3:].any()
+    assert flags["level_outlier"][0, 1]
+
+
+def test_scores_skip_gaps_and_short_series():
+    years = [2012, 2013, 2014, 2015]
+    matrix = np.array([
+        [1.0, np.nan, 6.0, 6.5],
+        [1.0, 2.0, np.nan, np.nan],
+    ])
+    scores = _score_series(years, matrix)
+
+    # Change is measured from the previous available reading across the gap
+    assert np.isclose(scores["delta"][0, 2], 5.0)
+    assert np.isnan(scores["delta"][0, 1])
+    # Too few readings for robust z-scores
+    assert np.isnan(scores["level_z"][1]).all()
+
+
+def test_thresholds_do_not_create_cache_entries(monkeypatch):
+    monkeypatch.setattr(analysis_service, "_anomaly_cache", type(analysis_service._anomaly_cache)())
+    first = detect_anomalies("West Bengal", "CGWB")
+    loose = detect_anomalies("West Bengal", "CGWB", z_threshold=10.0, jump_threshold=20.0)
+
+    assert first["districts_refreshed"] == first["districts_scanned"]
+    assert loose["districts_refreshed"] == 0
+    assert loose["anomaly_count"] < first["anomaly_count"]
+    assert list(analysis_service._anomaly_cache) == [("West Bengal", "CGWB")]
+
+
+def test_scores_refresh_only_when_data_changes(monkeypatch):
+    monkeypatch.setattr(analysis_service, "_anomaly_cache", type(analysis_service._anomaly_cache)())
+    version = [1.0]
+    monkeypatch.setattr(analysis_service, "groundwater_data_version", lambda: version[0])
+    loads = []
+    build = analysis_service.build_level_matrix
+    monkeypatch.setattr(analysis_service, "build_level_matrix", lambda *a: loads.append(a) or build(*a))
+
+    detect_anomalies("West Bengal", "CGWB")
+    detect_anomalies("West Bengal", "CGWB", district="Bankura")
+    assert len(loads) == 1
+
+    version[0] = 2.0
+    refreshed = detect_anomalies("West Bengal", "CGWB")
+    assert len(loads) == 2
+    assert refreshed["districts_refreshed"] == 0  # same readings, nothing rescored
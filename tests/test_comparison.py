@@ -0,0 +1,48 @@
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from app.services.analysis_service import fit_trend_lines, compare_districts, build_level_matrix
+
+
+def test_fit_trend_lines_matches_linear_regression_with_gaps():
+    years = [2012, 2013, 2014, 2015, 2016]
+    matrix = np.array([
+        [3.0, 4.0, 5.0, 6.0, 7.0],           # slope 1
+        [10.0, np.nan, 6.0, np.nan, 2.0],    # slope -2 with gaps
+        [1.0, np.nan, np.nan, np.nan, np.nan],  # single reading
+        [2.0, 2.0, 2.0, 2.0, 2.0],           # flat
+    ])
+    slope, intercept = fit_trend_lines(years, matrix)
+
+    assert np.allclose(slope[[0, 1, 3]], [1.0, -2.0, 0.0])
+    assert np.isnan(slope[2]) and np.isnan(intercept[2])
+    assert np.isclose(slope[0] * 2012 + intercept[0], 3.0)
+
+
+def test_compare_districts_slopes_match_per_district_regression():
+    districts, years, matrix = build_level_matrix("West Bengal", "CGWB")
+    result = compare_districts("West Bengal", "CGWB", sort_by="trend_slope", descending=False)
+
+    by_district = {row["district"]: row for row in result["districts"]}
+    assert len(by_district) == len(districts)
+    for name, row in zip(districts, matrix):
+        valid = ~np.isnan(row)
+        if valid.sum() < 2:
+            assert by_district[name]["trend_slope"] is None
+            continue
+        x = np.array(years)[valid].reshape(-1, 1)
+        expected = LinearRegression().fit(x, row[valid]).coef_[0]
+        assert by_district[name]["trend_slope"] == round(expected, 4)
+
+    slopes = [row["trend_slope"] for row in result["districts"] if row["trend_slope"] is not None]
+    assert slopes == sorted(slopes)
+    assert [row["rank"] for row in result["districts"]] == list(range(1, len(districts) + 1))
+
+
+def test_compare_districts_top_k_and_status():
+    result = compare_districts("West Bengal", "CGWB", 2012, 2024, sort_by="depletion", top_k=3)
+    assert len(result["districts"]) == 3
+    assert result["total_districts"] > 3
+    for row in result["districts"]:
+        level = row["latest_level"]
+        expected = "Critical" if level <= 5.0 else "Low" if level <= 10.0 else "Normal"
+        assert row["status"] == expected
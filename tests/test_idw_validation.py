@@ -0,0 +1,57 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+from app.services import analysis_service
+from app.services.analysis_service import (
+    build_level_matrix,
+    estimate_missing_groundwater_idw,
+    get_idw_parameters,
+    validate_idw,
+)
+from district_coords import DISTRICT_COORDS
+
+
+@pytest.fixture(autouse=True)
+def isolated_idw_params(tmp_path, monkeypatch):
+    path = str(tmp_path / "idw_params.json")
+    monkeypatch.setenv("IDW_PARAMS_PATH", path)
+    monkeypatch.setattr(analysis_service, "IDW_PARAMS_PATH", path)
+    return path
+
+
+def test_vectorized_loo_matches_per_district_loop():
+    districts, years, matrix = build_level_matrix("West Bengal", "CGWB")
+    errors = []
+    for name, row in zip(districts, matrix):
+        if name not in DISTRICT_COORDS:
+            continue
+        for year, level in zip(years, row):
+            if np.isnan(level):
+                continue
+            estimate = estimate_missing_groundwater_idw("West Bengal", name, year, power=2, max_distance_km=800.0)
+            assert estimate is not None
+            errors.append(estimate - level)
+    errors = np.array(errors)
+
+    result = validate_idw("West Bengal", "CGWB", powers=[2.0], radii_km=[800.0])
+    config = result["configurations"][0]
+    assert config["estimated_points"] == len(errors) == result["known_points"]
+    assert config["rmse"] == round(float(np.sqrt(np.mean(errors ** 2))), 4)
+    assert config["mae"] == round(float(np.mean(np.abs(errors))), 4)
+
+
+def test_best_configuration_respects_min_coverage():
+    result = validate_idw("West Bengal", "CGWB", powers=[1.0, 2.0], radii_km=[10.0, 800.0], min_coverage=0.9)
+    assert result["best"]["coverage"] >= 0.9
+    assert not result["applied"]
+    assert get_idw_parameters("West Bengal") == {"power": 2, "max_distance_km": 800.0}
+
+
+def test_adopted_parameters_are_visible_to_job_workers():
+    result = validate_idw("West Bengal", "CGWB", apply=True)
+    adopted = {"power": result["best"]["power"], "max_distance_km": result["best"]["max_distance_km"]}
+    assert get_idw_parameters("West Bengal") == adopted
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        assert pool.submit(get_idw_parameters, "West Bengal").result() == adopted
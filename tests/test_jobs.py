@@ -0,0 +1,161 @@
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.routers import jobs
+from app.services import job_service
+from app.services.job_service import JobQueueFull
+
+TRENDS = {"state": "West Bengal", "district": "Bankura", "agency": "CGWB"}
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Job registry backed by a thread pool running fake tasks that wait for the test to release them."""
+    gate = threading.Event()
+
+    def gated(fn):
+        # functools.wraps keeps the real signature, which _validate_task binds against
+        @functools.wraps(fn)
+        def task(**params):
+            gate.wait(5)
+            if params["district"] == "Nowhere":
+                raise ValueError("No data for district")
+            return {"district": params["district"]}
+        return task
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(job_service, "JOB_TASKS", {k: gated(fn) for k, fn in job_service.JOB_TASKS.items()})
+    monkeypatch.setattr(job_service, "_get_pool", lambda: pool)
+    monkeypatch.setattr(job_service, "_jobs", {})
+    monkeypatch.setattr(job_service, "_inflight", {})
+    yield gate
+    gate.set()
+    pool.shutdown(wait=True)
+
+
+def post(path, **kwargs):
+    app = FastAPI()
+    app.include_router(jobs, prefix="/api/v1")
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, **kwargs)
+
+    return asyncio.run(request())
+
+
+def wait_for_job(job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_service.get_job_result(job_id)
+        if job["status"] in job_service.TERMINAL_STATUSES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_identical_inflight_jobs_are_deduplicated(registry):
+    first = job_service.submit_job("trends", TRENDS)
+    # Spelling out the default explicitly is the same job
+    second = job_service.submit_job("trends", dict(TRENDS, historical_months=120, forecast_months=12))
+    other = job_service.submit_job("trends", dict(TRENDS, historical_months=24))
+    assert second["job_id"] == first["job_id"] and second["deduplicated"]
+    assert other["job_id"] != first["job_id"]
+
+    registry.set()
+    assert wait_for_job(first["job_id"])["result"] == {"district": "Bankura"}
+    # Once finished the key is released, so a new submission starts a fresh job
+    assert job_service.submit_job("trends", TRENDS)["job_id"] != first["job_id"]
+
+
+def test_batch_trends_items_use_the_endpoint_default(registry):
+    batch = job_service.submit_batch_job([{"kind": "trends", "params": TRENDS}])
+    task = job_service._jobs[batch["job_id"]]["_tasks"][0]
+    assert task["params"]["historical_months"] == 120
+
+
+def test_pending_task_bound_rejects_with_503(registry, monkeypatch):
+    monkeypatch.setattr(job_service, "JOB_MAX_PENDING_TASKS", 3)
+    job_service.submit_batch_job([
+        {"kind": "trends", "params": dict(TRENDS, district=d)} for d in ("Bankura", "Nadia")
+    ])
+    job_service.submit_job("trends", dict(TRENDS, district="Malda"))
+    with pytest.raises(JobQueueFull):
+        job_service.submit_job("trends", dict(TRENDS, district="Purulia"))
+
+    response = post("/api/v1/jobs/groundwater-trends", params=dict(TRENDS, district="Howrah"))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_finished_jobs_expire_after_ttl(registry):
+    registry.set()
+    job = job_service.submit_job("trends", TRENDS)
+    finished = wait_for_job(job["job_id"])
+    assert finished["expires_at"] == finished["finished_at"] + job_service.JOB_RESULT_TTL_SECONDS
+
+    job_service._purge_expired(finished["finished_at"] + job_service.JOB_RESULT_TTL_SECONDS - 1)
+    assert job_service.get_job(job["job_id"]) is not None
+    job_service._jobs[job["job_id"]]["finished_at"] -= job_service.JOB_RESULT_TTL_SECONDS + 1
+    assert job_service.get_job(job["job_id"]) is None
+
+
+def test_batch_reports_failures_per_item(registry):
+    registry.set()
+    batch = job_service.submit_batch_job([
+        {"kind": "trends", "params": TRENDS},
+        {"kind": "trends", "params": dict(TRENDS, district="Nowhere")},
+    ])
+    job = wait_for_job(batch["job_id"])
+    assert job["status"] == "completed"
+    assert job["progress"] == {"completed": 2, "total": 2}
+    ok, failed = job["result"]
+    assert ok["status"] == "completed" and ok["result"] == {"district": "Bankura"}
+    assert failed["status"] == "failed" and failed["error_code"] == 400
+    assert "No data for district" in failed["error"]
+
+
+def test_bad_parameter_types_are_rejected_with_400(registry):
+    bad_items = [
+        {"kind": "trends", "params": dict(TRENDS, historical_months="abc")},
+        {"kind": "trends", "params": dict(TRENDS, unknown=1)},
+        {"kind": "forecast", "params": TRENDS},
+    ]
+    for item in bad_items:
+        response = post("/api/v1/jobs/batch", json={"items": [item]})
+        assert response.status_code == 400, item
+        assert response.json()["detail"].startswith("Data error:")
+    assert not job_service._jobs
+
+
+def test_broken_pool_is_replaced_and_submission_retried(registry, monkeypatch):
+    registry.set()
+    working = ThreadPoolExecutor(max_workers=1)
+
+    class BrokenPool:
+        def submit(self, *args, **kwargs):
+            raise BrokenProcessPool("A child process terminated abruptly")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    pools = [BrokenPool(), working]
+    monkeypatch.setattr(job_service, "_pool", None)
+
+    def get_pool():
+        if job_service._pool is None:
+            job_service._pool = pools.pop(0)
+        return job_service._pool
+
+    monkeypatch.setattr(job_service, "_get_pool", get_pool)
+    job = job_service.submit_job("trends", TRENDS)
+    assert wait_for_job(job["job_id"])["status"] == "completed"
+    assert job_service._pool is working
+    working.shutdown(wait=True)
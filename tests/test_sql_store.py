@@ -0,0 +1,92 @@
+import os
+import shutil
+import sqlite3
+import pandas as pd
+import pytest
+from app.services import sql_store, wris_api_client
+from app.services.wris_api_client import fetch_groundwater_data, fetch_rainfall_data, load_groundwater_frame
+
+STATE = "West Bengal"
+
+
+@pytest.fixture
+def data_files(tmp_path, monkeypatch):
+    """Copies of the bundled CSVs and a scratch database, so both backends read the same files."""
+    for name in ("GROUNDWATER_CSV", "RAINFALL_CSV"):
+        source = getattr(wris_api_client, name)
+        monkeypatch.setattr(wris_api_client, name, str(shutil.copy(source, tmp_path / source)))
+    monkeypatch.setattr(sql_store, "SQLITE_PATH", str(tmp_path / "wris_data.db"))
+    sql_store.close_pool()
+    yield tmp_path
+    sql_store.close_pool()
+
+
+def both_backends(monkeypatch, fetch):
+    results = {}
+    for backend in ("csv", "sqlite"):
+        monkeypatch.setattr(wris_api_client, "DATA_BACKEND", backend)
+        results[backend] = fetch()
+    return results["csv"], results["sqlite"]
+
+
+@pytest.mark.parametrize("district, start, end", [
+    ("Bankura", "2000-01-01", "2030-12-31"),
+    ("Bankura", "2020-01-01", "2022-12-31"),
+    ("Darjeeling", "2023-01-01", "2023-12-31"),
+    ("Nowhere", "2023-01-01", "2023-12-31"),
+])
+def test_groundwater_lookups_match_csv_backend(data_files, monkeypatch, district, start, end):
+    csv, sqlite = both_backends(monkeypatch, lambda: fetch_groundwater_data(STATE, district, "CGWB", start, end))
+    assert sqlite == csv
+
+
+@pytest.mark.parametrize("page, size", [(0, 5), (1, 5), (2, 5), (3, 5)])
+def test_groundwater_pagination_matches_csv_backend(data_files, monkeypatch, page, size):
+    csv, sqlite = both_backends(monkeypatch, lambda: fetch_groundwater_data(
+        STATE, "Bankura", "CGWB", "2000-01-01", "2030-12-31", page, size))
+    assert sqlite == csv
+
+
+def test_rainfall_lookups_and_pagination_match_csv_backend(data_files, monkeypatch):
+    districts = pd.read_csv(wris_api_client.RAINFALL_CSV)["district"].unique()
+    for district in districts:
+        for page, size in ((0, 1000), (0, 1), (1, 1), (5, 1)):
+            csv, sqlite = both_backends(monkeypatch, lambda: fetch_rainfall_data(
+                STATE, district, "CGWB", "2000-01-01", "2030-12-31", page, size))
+            assert sqlite == csv, (district, page, size)
+    # Agency is filtered where the data records it
+    csv, sqlite = both_backends(monkeypatch, lambda: fetch_rainfall_data(
+        STATE, districts[0], "OTHER", "2000-01-01", "2030-12-31"))
+    assert sqlite == csv
+
+
+def test_state_frame_matches_csv_backend(data_files, monkeypatch):
+    csv, sqlite = both_backends(monkeypatch, lambda: load_groundwater_frame(STATE, "CGWB"))
+    assert len(csv) > 0
+    pd.testing.assert_frame_equal(
+        sqlite.reset_index(drop=True), csv[sqlite.columns].reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_touching_the_csv_rebuilds_the_table(data_files, monkeypatch):
+    monkeypatch.setattr(wris_api_client, "DATA_BACKEND", "sqlite")
+    csv_path = wris_api_client.GROUNDWATER_CSV
+    params = (STATE, "Testpur", "CGWB", "2023-01-01", "2023-12-31")
+    assert fetch_groundwater_data(*params)["data"] == []
+
+    with open(csv_path, "a") as f:
+        f.write("West Bengal,Testpur,2023,4.2,12.0,2023-04-30T10:00:00,m\n")
+    mtime = os.path.getmtime(csv_path) + 5
+    os.utime(csv_path, (mtime, mtime))
+
+    assert [row["dataValue"] for row in fetch_groundwater_data(*params)["data"]] == [4.2]
+    with sqlite3.connect(sql_store.SQLITE_PATH) as conn:
+        recorded = conn.execute(
+            "SELECT source_mtime FROM source_meta WHERE table_name = 'groundwater'"
+        ).fetchone()[0]
+    assert recorded == mtime
+
+    # A fresh process (empty in-memory cache) trusts source_meta instead of rebuilding
+    sql_store.close_pool()
+    monkeypatch.setattr(sql_store, "_build_table", lambda *args: pytest.fail("table rebuilt unnecessarily"))
+    assert [row["dataValue"] for row in fetch_groundwater_data(*params)["data"]] == [4.2]